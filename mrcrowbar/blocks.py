@@ -83,7 +83,7 @@ class RefDescriptor:
 class BlockMeta( type ):
     def __new__( mcs, name, bases, attrs ):
         """Metaclass for Block which detects and wraps attributes from the class definition."""
-        from mrcrowbar.checks import Check
+        from mrcrowbar.checks import Check, Const
         from mrcrowbar.fields import Field
         from mrcrowbar.refs import Coda, Ref
 
@@ -156,6 +156,24 @@ class BlockMeta( type ):
 
         coda_size = max( coda_size, coda_chain_size )
 
+        # if every Field has a fixed size at a fixed offset, the size of the Block
+        # doesn't depend on the contents and can be worked out up front.
+        # Const checks are fine, as they measure the same Field they wrap.
+        fixed_size: int | None = 0
+        for value in fields.values():
+            if not isinstance( getattr( value, "offset", None ), int ):
+                fixed_size = None
+                break
+            if not value.is_fixed_size() or value.get_fixed_size() is None:
+                fixed_size = None
+                break
+            if value.exists:
+                fixed_size = max( fixed_size, value.offset + value.get_fixed_size() )
+            else:
+                fixed_size = max( fixed_size, value.offset )
+        if not all( isinstance( check, Const ) for check in checks.values() ):
+            fixed_size = None
+
         # Convert list of types into fields for new klass
         for key, field in fields.items():
             attrs[key] = FieldDescriptor( key )
@@ -168,6 +186,7 @@ class BlockMeta( type ):
         attrs["_checks"] = checks
         attrs["_coda_field_names"] = coda_field_names
         attrs["_coda_size"] = coda_size
+        attrs["_fixed_size"] = fixed_size
 
         klass = type.__new__( mcs, name, bases, attrs )
 
@@ -201,6 +220,7 @@ class Block( metaclass=BlockMeta ):
     _checks: OrderedDict[str, Check]
     _coda_size: int
     _coda_field_names: list[str]
+    _fixed_size: int | None
     _cache_refs: bool
     _field_data: dict[str, Any]
     _ref_cache: dict[str, Any]
@@ -495,6 +515,8 @@ class Block( metaclass=BlockMeta ):
     def get_size( self ) -> int:
         """Get the projected size (in bytes) of the exported data from this Block instance."""
         klass = self.__class__
+        if klass._fixed_size is not None:
+            return klass._fixed_size
         size = 0
         for name in klass._fields:
             size = max(
@@ -557,6 +579,11 @@ class Block( metaclass=BlockMeta ):
             Field object on the object to reference.
         """
         klass = self.__class__
+        # Field equality compares serialised contents, which is slow; the field is
+        # nearly always the exact object from the class, so check that first
+        for field_name, field_obj in klass._fields.items():
+            if field_obj is field:
+                return f"{self.get_path()}.{field_name}"
         for field_name, field_obj in klass._fields.items():
             if field_obj == field:
                 return f"{self.get_path()}.{field_name}"
@@ -324,9 +324,11 @@ def _from_raw_type(
     signedness: SignedEncoding,
     endian: EndianEncoding,
 ) -> Callable[[BytesReadType], Number]:
-    result: Callable[[BytesReadType], Number] = lambda buffer: struct.unpack(
-        get_raw_type_struct( format_type, field_size, signedness, endian ), buffer
-    )[0]
+    # the format never changes, so compile it once rather than on every call
+    unpack = struct.Struct(
+        get_raw_type_struct( format_type, field_size, signedness, endian )
+    ).unpack
+    result: Callable[[BytesReadType], Number] = lambda buffer: unpack( buffer )[0]
     result.__doc__ = "Convert a {} byte string to a Python {}.".format(
         *get_raw_type_description( format_type, field_size, signedness, endian )
     )
@@ -339,9 +341,10 @@ def _to_raw_type(
     signedness: SignedEncoding,
     endian: EndianEncoding,
 ) -> Callable[[Number], bytes]:
-    result: Callable[[Number], bytes] = lambda value: struct.pack(
-        get_raw_type_struct( format_type, field_size, signedness, endian ), value
-    )
+    pack = struct.Struct(
+        get_raw_type_struct( format_type, field_size, signedness, endian )
+    ).pack
+    result: Callable[[Number], bytes] = lambda value: pack( value )
     result.__doc__ = "Convert a Python {1} to a {0} byte string.".format(
         *get_raw_type_description( format_type, field_size, signedness, endian )
     )
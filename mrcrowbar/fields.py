@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 import logging
+import struct
 
 from typing_extensions import Literal
 
@@ -840,11 +841,11 @@ class ChunkField( StreamField ):
                 )
                 pointer += self.id_field.field_size
             elif self.id_size:
-                chunk_id = buffer[pointer : pointer + self.id_size]
+                chunk_id = bytes( buffer[pointer : pointer + self.id_size] )
                 pointer += len( chunk_id )
             else:
                 for test_id in chunk_map:
-                    if buffer[pointer:].startswith( test_id ):
+                    if buffer[pointer : pointer + len( test_id )] == test_id:
                         chunk_id = test_id
                         break
                 if not chunk_id:
@@ -919,11 +920,11 @@ class ChunkField( StreamField ):
         if chunk_length is not None:
             if self.length_inclusive:
                 chunk_length -= pointer - offset
-            chunk_buffer = buffer[pointer : pointer + chunk_length]
+            chunk_buffer = bytes( buffer[pointer : pointer + chunk_length] )
             pointer += chunk_length
             chunk = constructor( chunk_buffer )
         else:
-            chunk = constructor( buffer[pointer:] )
+            chunk = constructor( bytes( buffer[pointer:] ) )
             pointer += chunk.get_size()
         result = Chunk( id=chunk_id, obj=chunk )
 
@@ -1194,11 +1195,20 @@ class BlockField( StreamField ):
             return None, offset + len( fill )
         # if we have an inline transform, apply it
         elif self.transform:
-            data = self.transform.import_data( buffer[offset:], parent=parent )
+            data = self.transform.import_data(
+                bytes( buffer[offset:] ), parent=parent
+            )
             block = constructor( data.payload )
             return block, offset + data.end_offset
-        # otherwise, create a block
-        block = constructor( buffer[offset:] )
+        # otherwise, create a block. Blocks using the stock field parser read from a
+        # view over the rest of the buffer rather than a copy, which keeps streams
+        # of Blocks linear; the fields themselves still return bytes.
+        from mrcrowbar.blocks import Block
+
+        if klass.import_data is Block.import_data:
+            block = constructor( memoryview( buffer )[offset:] )
+        else:
+            block = constructor( bytes( buffer[offset:] ) )
         size = block.get_size()
         if size == 0:
             if stream:
@@ -1528,6 +1538,8 @@ class StringField( StreamField ):
         else:
             # no element size hints, use more guesswork
             data = buffer[pointer:]
+        if isinstance( data, memoryview ):
+            data = data.tobytes()
 
         # if we have an inline transform, apply it
         if self.transform:
@@ -1904,6 +1916,77 @@ class NumberField( StreamField ):
         self.range = range
         self.enum = enum
 
+    def get_from_buffer(
+        self, buffer: common.BytesReadType, parent: Block | None = None
+    ) -> encoding.NumberType | list[encoding.NumberType]:
+        result = self._get_from_buffer_fast( buffer, parent )
+        if result is not None:
+            return result
+        return super().get_from_buffer( buffer, parent=parent )
+
+    def _get_from_buffer_fast(
+        self, buffer: common.BytesReadType, parent: Block | None = None
+    ) -> encoding.NumberType | list[encoding.NumberType] | None:
+        # plain numbers at a fixed position can be decoded with a single struct call,
+        # instead of going through get_element_from_buffer once per element.
+        # returns None if the field needs the slow path.
+        if (
+            self.bitmask is not None
+            or self.range
+            or self.enum
+            or self.stop_check is not None
+            or self.stream_end is not None
+            or type( self ).get_element_from_buffer
+            is not NumberField.get_element_from_buffer
+            or not common.is_bytes( buffer )
+        ):
+            return None
+
+        count = property_get( self.count, parent )
+        stream = property_get( self.stream, parent )
+        alignment = property_get( self.alignment, parent )
+        exists = property_get( self.exists, parent )
+        format_type = property_get( self.format_type, parent )
+        field_size = property_get( self.field_size, parent )
+        signedness = property_get( self.signedness, parent )
+        if (
+            stream
+            or not exists
+            or (count is not None and count < 0)
+            or (alignment and field_size % alignment)
+            or (format_type, field_size, signedness) not in encoding.RAW_TYPE_STRUCT
+        ):
+            return None
+
+        offset = property_get( self.offset, parent, caller=self )
+        if offset is None or offset < 0:
+            return None
+        length = property_get( self.length, parent )
+        end_offset = property_get( self.end_offset, parent )
+        if end_offset is not None:
+            length = end_offset - offset
+        limit = len( buffer )
+        if length is not None:
+            limit = min( limit, offset + length )
+        element_count = 1 if count is None else count
+        if offset + element_count * field_size > limit:
+            return None
+        if element_count == 0:
+            return []
+
+        endian = property_get( self.endian, parent )
+        if endian is None and field_size > 1:
+            # no byte order to decode with, leave the error to the slow path
+            return None
+        result = struct.unpack_from(
+            encoding.get_raw_type_struct(
+                format_type, field_size, signedness, endian, count=element_count
+            ),
+            buffer,
+            offset,
+        )
+        return list( result ) if count is not None else result[0]
+
     def get_element_from_buffer(
         self,
         offset: int,
@@ -2075,7 +2158,7 @@ class NumberField( StreamField ):
         result &= not isinstance( self.signedness, Ref )
         result &= not isinstance( self.endian, Ref )
         # can't be streaming
-        result &= self.stream is not None
+        result &= not self.stream
         return result
 
     def get_fixed_size( self ) -> int | None:
@@ -2167,6 +2250,12 @@ class Bits( NumberField ):
             (1 << i) for i, x in enumerate( reversed( self.mask_bits ) ) if x == "1"
         ]
         self.check_range = rang( 0, 1 << len( self.bits ) )
+        # contiguous masks (the usual case) can be read with a single and + shift
+        self._mask = bits
+        low_bit = bits & -bits
+        self._shift = (
+            low_bit.bit_length() - 1 if bits and not (bits & (bits + low_bit)) else None
+        )
 
         # because we reinterpret the value of the element, we need a seperate enum evaluation
         # compared to the base class
@@ -2199,9 +2288,12 @@ class Bits( NumberField ):
         result, end_offset = super().get_element_from_buffer(
             offset, buffer, parent, index=index
         )
-        element = 0
-        for i, x in enumerate( self.bits ):
-            element += (1 << i) if (result & x) else 0
+        if self._shift is not None:
+            element = (result & self._mask) >> self._shift
+        else:
+            element = 0
+            for i, x in enumerate( self.bits ):
+                element += (1 << i) if (result & x) else 0
         if self.enum_t:
             if element not in [x.value for x in self.enum_t]:
                 logger.warning(
@@ -2217,10 +2309,13 @@ class Bits( NumberField ):
     ):
         if self.enum_t:
             element = self.enum_t( element ).value
-        packed = 0
-        for i, x in enumerate( self.bits ):
-            if element & (1 << i):
-                packed |= x
+        if self._shift is not None:
+            packed = (element << self._shift) & self._mask
+        else:
+            packed = 0
+            for i, x in enumerate( self.bits ):
+                if element & (1 << i):
+                    packed |= x
 
         return super().update_buffer_with_element(
             offset, packed, buffer, parent, index=index
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import functools
+
 from mrcrowbar import models as mrc
 from mrcrowbar.lib.images import base as img
 
@@ -39,10 +41,21 @@ YODA_PALETTE_RAW = (
     "00000000000000000000000000000000000000000000000000000000ffffff00"
 )
 
-YODA_PALETTE = img.from_palette_bytes(
-    bytes.fromhex( YODA_PALETTE_RAW ), stride=4, order=(2, 1, 0)
-)
-YODA_PALETTE[0] = img.Transparent()
+
+@functools.lru_cache( maxsize=None )
+def _yoda_palette():
+    # decoded on first use, so importing the module for non-tile work is free
+    palette = img.from_palette_bytes(
+        bytes.fromhex( YODA_PALETTE_RAW ), stride=4, order=(2, 1, 0)
+    )
+    palette[0] = img.Transparent()
+    return palette
+
+
+def __getattr__( name ):
+    if name == "YODA_PALETTE":
+        return _yoda_palette()
+    raise AttributeError( f"module {__name__!r} has no attribute {name!r}" )
 
 
 class VERS( mrc.Block ):
@@ -104,15 +117,17 @@ class TileData( mrc.Block ):
     unknown1 = mrc.Bytes( 0x00, length=4 )
     data = mrc.Bytes( 0x04, length=0x400 )
 
-    def __init__( self, *args, **kwargs ):
-        super().__init__( *args, **kwargs )
-        self.image = img.IndexedImage(
-            self,
-            width=32,
-            height=32,
-            source=mrc.Ref( "data" ),
-            palette=YODA_PALETTE,
-        )
+    @property
+    def image( self ):
+        if not hasattr( self, "_image" ):
+            self._image = img.IndexedImage(
+                self,
+                width=32,
+                height=32,
+                source=mrc.Ref( "data" ),
+                palette=_yoda_palette(),
+            )
+        return self._image
 
 
 # ENDF
@@ -3,157 +3,162 @@ Xargon (DOS, 1994)."""
 
 from __future__ import annotations
 
+from array import array
+
 from mrcrowbar import models as mrc
 from mrcrowbar.lib.audio import base as aud
 
 # source: Xargon source code release - https://www.classicdosgames.com/game/Xargon.html
 
-PC_SPEAKER_NOTE_TABLE = [
-    64,
-    67,
-    71,
-    76,
-    80,
-    85,
-    90,
-    95,
-    101,
-    107,
-    114,
-    121,
-    0,
-    0,
-    0,
-    0,
-    128,
-    135,
-    143,
-    152,
-    161,
-    170,
-    181,
-    191,
-    203,
-    215,
-    228,
-    242,
-    0,
-    0,
-    0,
-    0,
-    256,
-    271,
-    287,
-    304,
-    322,
-    341,
-    362,
-    383,
-    406,
-    430,
-    456,
-    483,
-    0,
-    0,
-    0,
-    0,
-    512,
-    542,
-    574,
-    608,
-    645,
-    683,
-    724,
-    767,
-    812,
-    861,
-    912,
-    967,
-    0,
-    0,
-    0,
-    0,
-    1024,
-    1084,
-    1149,
-    1217,
-    1290,
-    1366,
-    1448,
-    1534,
-    1625,
-    1722,
-    1825,
-    1933,
-    0,
-    0,
-    0,
-    0,
-    2048,
-    2169,
-    2298,
-    2435,
-    2580,
-    2733,
-    2896,
-    3068,
-    3250,
-    3444,
-    3649,
-    3866,
-    0,
-    0,
-    0,
-    0,
-    4096,
-    4339,
-    4597,
-    4870,
-    5160,
-    5467,
-    5792,
-    6137,
-    6501,
-    6888,
-    7298,
-    7732,
-    0,
-    0,
-    0,
-    0,
-    8192,
-    8679,
-    9195,
-    9741,
-    10321,
-    10935,
-    11585,
-    12274,
-    13003,
-    13777,
-    14596,
-    15646,
-    0,
-    0,
-    0,
-    0,
-    16384,
-    17358,
-    18390,
-    19483,
-    20642,
-    21870,
-    23170,
-    24548,
-    26007,
-    27554,
-    29192,
-    30928,
-    0,
-    0,
-    0,
-    0,
-]
+PC_SPEAKER_NOTE_TABLE = array(
+    "H",
+    [
+        64,
+        67,
+        71,
+        76,
+        80,
+        85,
+        90,
+        95,
+        101,
+        107,
+        114,
+        121,
+        0,
+        0,
+        0,
+        0,
+        128,
+        135,
+        143,
+        152,
+        161,
+        170,
+        181,
+        191,
+        203,
+        215,
+        228,
+        242,
+        0,
+        0,
+        0,
+        0,
+        256,
+        271,
+        287,
+        304,
+        322,
+        341,
+        362,
+        383,
+        406,
+        430,
+        456,
+        483,
+        0,
+        0,
+        0,
+        0,
+        512,
+        542,
+        574,
+        608,
+        645,
+        683,
+        724,
+        767,
+        812,
+        861,
+        912,
+        967,
+        0,
+        0,
+        0,
+        0,
+        1024,
+        1084,
+        1149,
+        1217,
+        1290,
+        1366,
+        1448,
+        1534,
+        1625,
+        1722,
+        1825,
+        1933,
+        0,
+        0,
+        0,
+        0,
+        2048,
+        2169,
+        2298,
+        2435,
+        2580,
+        2733,
+        2896,
+        3068,
+        3250,
+        3444,
+        3649,
+        3866,
+        0,
+        0,
+        0,
+        0,
+        4096,
+        4339,
+        4597,
+        4870,
+        5160,
+        5467,
+        5792,
+        6137,
+        6501,
+        6888,
+        7298,
+        7732,
+        0,
+        0,
+        0,
+        0,
+        8192,
+        8679,
+        9195,
+        9741,
+        10321,
+        10935,
+        11585,
+        12274,
+        13003,
+        13777,
+        14596,
+        15646,
+        0,
+        0,
+        0,
+        0,
+        16384,
+        17358,
+        18390,
+        19483,
+        20642,
+        21870,
+        23170,
+        24548,
+        26007,
+        27554,
+        29192,
+        30928,
+        0,
+        0,
+        0,
+        0,
+    ],
+)
 
 
 class Sound( mrc.Block ):
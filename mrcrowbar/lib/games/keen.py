@@ -26,28 +26,42 @@ import logging
 
 logger = logging.getLogger( __name__ )
 
-from mrcrowbar import bits
 from mrcrowbar import models as mrc
 from mrcrowbar import utils
 from mrcrowbar.lib.hardware import ibm_pc
 from mrcrowbar.lib.images import base as img
 
+# one-byte strings for every byte value, shared between decoder calls
+_SINGLE_BYTES = [bytes( (i,) ) for i in range( 256 )]
+
+
+def _rle_decode( buffer ):
+    final_length = utils.from_uint32_le( buffer[0:4] )
+    i = 4
+    out = bytearray()
+    # one token per iteration, so keep the lookups in the loop to locals
+    extend = out.extend
+    single_bytes = _SINGLE_BYTES
+    pos = 0
+    while pos < final_length:
+        byte = buffer[i]
+        if byte >= 128:
+            count = byte - 127
+            extend( buffer[i + 1 : i + 1 + count] )
+            i += count + 1
+        else:
+            count = byte + 3
+            extend( single_bytes[buffer[i + 1]] * count )
+            i += 2
+        pos += count
+
+    return out, i
+
 
 class RLECompressor( mrc.Transform ):
     def import_data( self, buffer, parent=None ):
-        final_length = utils.from_uint32_le( buffer[0:4] )
-        i = 4
-        out = bytearray()
-        while len( out ) < final_length:
-            byte = buffer[i]
-            if byte >= 128:
-                out.extend( buffer[i + 1 : i + byte - 126] )
-                i += byte - 126
-            else:
-                out.extend( buffer[i + 1 : i + 2] * (byte + 3) )
-                i += 2
-
-        return mrc.TransformResult( payload=bytes( out ), end_offset=i )
+        out, end_offset = _rle_decode( buffer )
+        return mrc.TransformResult( payload=bytes( out ), end_offset=end_offset )
 
 
 class RLEWCompressor( mrc.Transform ):
@@ -55,16 +69,27 @@ class RLEWCompressor( mrc.Transform ):
         final_length = utils.from_uint32_le( buffer[0:4] )
         i = 4
         out = bytearray()
-        while len( out ) < final_length:
-            word = buffer[i : i + 2]
-            if word == b"\xfe\xfe":
-                count = utils.from_uint16_le( buffer[i + 2 : i + 4] )
-                data = buffer[i + 4 : i + 6]
-                out.extend( data * count )
-                i += 6
-            else:
-                out.extend( word )
-                i += 2
+        pos = 0
+        while pos < final_length:
+            # literal words make up the bulk of the stream, so rather than walk them
+            # one at a time, seek to the next word-aligned escape marker and copy
+            # everything before it in one go
+            remaining = final_length - pos
+            end = i + remaining + (remaining % 2)
+            mark = buffer.find( b"\xfe\xfe", i, end )
+            while mark != -1 and (mark - i) % 2:
+                mark = buffer.find( b"\xfe\xfe", mark + 1, end )
+            if mark == -1:
+                out.extend( buffer[i:end] )
+                i = end
+                break
+
+            out.extend( buffer[i:mark] )
+            count = buffer[mark + 2] | (buffer[mark + 3] << 8)
+            data = buffer[mark + 4 : mark + 6]
+            out.extend( data * count )
+            pos += (mark - i) + len( data ) * count
+            i = mark + 6
 
         return mrc.TransformResult( payload=bytes( out ), end_offset=i )
 
@@ -74,55 +99,87 @@ class LZWCompressor( mrc.Transform ):
         decomp_size = utils.from_uint32_le( buffer[:4] )
         max_bits = utils.from_uint16_le( buffer[4:6] )  # should be 12
 
-        lookup = [bytes( (i,) ) for i in range( 256 )]
+        lookup = list( _SINGLE_BYTES )
         lookup.append( None )  # 256: error
         lookup.append( None )  # 257: end of data
 
-        output = bytearray()
+        # the decompressed size is known up front, so write into a fixed buffer
+        output = bytearray( decomp_size )
+        pos = 0
+
+        usebits = 9
+        lookup_len = len( lookup )
+        max_lookup = 1 << max_bits
+        next_bump = (1 << usebits) - 1
+        # checked once up front, the per-code logging is too hot to leave unguarded
+        debug = logger.isEnabledFor( logging.DEBUG )
+
+        # codes are packed MSB-first from offset 6. the first one is always 9 bits;
+        # after that, whole bytes are shifted into an accumulator as needed
+        fcode = ((buffer[6] << 8) | buffer[7]) >> 7
+        acc = buffer[7] & 0x7f
+        acc_bits = 7
+        in_pos = 8
+        in_size = len( buffer )
 
-        bs = bits.BitStream( buffer, 6, bit_endian="big", io_endian="big" )
-        state = {"usebits": 9}
-
-        def add_to_lookup( state, entry ):
-            if len( lookup ) < (1 << max_bits):
-                logger.debug( f"lookup[{len( lookup )}] = {entry}" )
-                lookup.append( entry )
-                if len( lookup ) == (1 << state["usebits"]) - 1:
-                    state["usebits"] = min( state["usebits"] + 1, max_bits )
-                    logger.debug( "usebits = {}".format( state["usebits"] ) )
-            return
-
-        fcode = bs.read( state["usebits"] )
         match = lookup[fcode]
-        logger.debug( f"fcode={fcode},match={match}" )
-        output.extend( match )
+        if debug:
+            logger.debug( f"fcode={fcode},match={match}" )
+        output[pos : pos + len( match )] = match
+        pos += len( match )
         while True:
-            ncode = bs.read( state["usebits"] )
-            logger.debug( f"ncode={ncode}" )
+            while acc_bits < usebits:
+                if in_pos < in_size:
+                    acc = (acc << 8) | buffer[in_pos]
+                elif in_pos == in_size and acc_bits:
+                    # the final code can run past the end, pad it with one byte of zeros
+                    acc <<= 8
+                else:
+                    raise Exception( "Ran out of data before the end code" )
+                in_pos += 1
+                acc_bits += 8
+            acc_bits -= usebits
+            ncode = acc >> acc_bits
+            acc &= (1 << acc_bits) - 1
+            if debug:
+                logger.debug( f"ncode={ncode}" )
             if ncode == 257:
                 # end of data
                 break
             elif ncode == 256:
                 # error
                 raise Exception( "Found error code, data is not valid" )
-            elif ncode < len( lookup ):
+            elif ncode < lookup_len:
                 nmatch = lookup[ncode]
             else:
                 nmatch = match + match[0:1]
-            logger.debug( f"match={match}" )
-            logger.debug( f"nmatch={nmatch}" )
-            output.extend( nmatch )
+            if debug:
+                logger.debug( f"match={match}" )
+                logger.debug( f"nmatch={nmatch}" )
+            output[pos : pos + len( nmatch )] = nmatch
+            pos += len( nmatch )
 
             # add code to lookup
-            add_to_lookup( state, match + nmatch[0:1] )
+            if lookup_len < max_lookup:
+                entry = match + nmatch[0:1]
+                if debug:
+                    logger.debug( f"lookup[{lookup_len}] = {entry}" )
+                lookup.append( entry )
+                lookup_len += 1
+                if lookup_len == next_bump:
+                    usebits = min( usebits + 1, max_bits )
+                    next_bump = (1 << usebits) - 1
+                    if debug:
+                        logger.debug( f"usebits = {usebits}" )
             match = nmatch
 
-        if len( output ) != decomp_size:
+        if pos != decomp_size:
             logger.warning(
                 "{}: was expecting data of size {}, got data of size {} instead".format(
-                    self, decomp_size, len( output )
+                    self, decomp_size, pos
                 )
             )
+            del output[pos:]
 
         return mrc.TransformResult( payload=bytes( output ), end_offset=len( buffer ) )
 
@@ -176,46 +233,52 @@ class EGAHeaderSpriteRef( mrc.Block ):
 class EGATile8( mrc.Block ):
     image_data = mrc.Bytes( 0x00, length=mrc.Ref( "_parent.tile8_size" ) )
 
-    def __init__( self, *args, **kwargs ):
-        super().__init__( *args, **kwargs )
-        self.tiles = img.IndexedImage(
-            self,
-            width=8,
-            height=8,
-            source=mrc.Ref( "image_data" ),
-            frame_count=mrc.Ref( "_parent._parent._egahead.tile8_count" ),
-            palette=ibm_pc.EGA_DEFAULT_PALETTE,
-        )
+    @property
+    def tiles( self ):
+        if not hasattr( self, "_tiles" ):
+            self._tiles = img.IndexedImage(
+                self,
+                width=8,
+                height=8,
+                source=mrc.Ref( "image_data" ),
+                frame_count=mrc.Ref( "_parent._parent._egahead.tile8_count" ),
+                palette=ibm_pc.EGA_DEFAULT_PALETTE,
+            )
+        return self._tiles
 
 
 class EGATile16( mrc.Block ):
     image_data = mrc.Bytes( 0x00, length=mrc.Ref( "_parent.tile16_size" ) )
 
-    def __init__( self, *args, **kwargs ):
-        super().__init__( *args, **kwargs )
-        self.tiles = img.IndexedImage(
-            self,
-            width=16,
-            height=16,
-            source=mrc.Ref( "image_data" ),
-            frame_count=mrc.Ref( "_parent._parent._egahead.tile16_count" ),
-            palette=ibm_pc.EGA_DEFAULT_PALETTE,
-        )
+    @property
+    def tiles( self ):
+        if not hasattr( self, "_tiles" ):
+            self._tiles = img.IndexedImage(
+                self,
+                width=16,
+                height=16,
+                source=mrc.Ref( "image_data" ),
+                frame_count=mrc.Ref( "_parent._parent._egahead.tile16_count" ),
+                palette=ibm_pc.EGA_DEFAULT_PALETTE,
+            )
+        return self._tiles
 
 
 class EGATile32( mrc.Block ):
     image_data = mrc.Bytes( 0x00, length=mrc.Ref( "_parent.tile32_size" ) )
 
-    def __init__( self, *args, **kwargs ):
-        super().__init__( *args, **kwargs )
-        self.tiles = img.IndexedImage(
-            self,
-            width=32,
-            height=32,
-            source=mrc.Ref( "image_data" ),
-            frame_count=mrc.Ref( "_parent._parent._egahead.tile32_count" ),
-            palette=ibm_pc.EGA_DEFAULT_PALETTE,
-        )
+    @property
+    def tiles( self ):
+        if not hasattr( self, "_tiles" ):
+            self._tiles = img.IndexedImage(
+                self,
+                width=32,
+                height=32,
+                source=mrc.Ref( "image_data" ),
+                frame_count=mrc.Ref( "_parent._parent._egahead.tile32_count" ),
+                palette=ibm_pc.EGA_DEFAULT_PALETTE,
+            )
+        return self._tiles
 
 
 class EGATileStore( mrc.Block ):
@@ -260,15 +323,15 @@ class EGATileStore( mrc.Block ):
 
     @property
     def tile8_size( self ):
-        return self._parent._egahead.tile8_count * 8 * 8
+        return self._parent._egahead.tile8_count * (8 * 8)
 
     @property
     def tile16_size( self ):
-        return self._parent._egahead.tile16_count * 16 * 16
+        return self._parent._egahead.tile16_count * (16 * 16)
 
     @property
     def tile32_size( self ):
-        return self._parent._egahead.tile16_count * 32 * 32
+        return self._parent._egahead.tile32_count * (32 * 32)
 
 
 class EGALatch( mrc.Block ):
@@ -299,17 +362,15 @@ class SoundRef( mrc.Block ):
 
 
 class PreviewCompressor( mrc.Transform ):
-    rle = RLECompressor()
     # each plane is stored with 192 bytes padding at the end
     plan = img.Planarizer( bpp=4, width=320, height=200, plane_padding=192 )
 
     def import_data( self, buffer, parent=None ):
         assert utils.is_bytes( buffer )
-        stage_1 = self.rle.import_data( buffer )
-        stage_2 = self.plan.import_data( stage_1.payload )
-        return mrc.TransformResult(
-            payload=stage_2.payload, end_offset=stage_1.end_offset
-        )
+        # hand the RLE output straight to the planarizer, skipping the bytes() copy
+        planes, end_offset = _rle_decode( buffer )
+        stage_2 = self.plan.import_data( planes )
+        return mrc.TransformResult( payload=stage_2.payload, end_offset=end_offset )
 
 
 class Preview( mrc.Block ):
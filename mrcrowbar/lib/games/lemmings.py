@@ -21,8 +21,8 @@ Extra special thanks to ccexplore and Mindless
 
 from __future__ import annotations
 
-import itertools
 import logging
+import re
 from enum import IntEnum
 
 logger = logging.getLogger( __name__ )
@@ -34,12 +34,24 @@ from mrcrowbar.lib.hardware import ibm_pc
 from mrcrowbar.lib.images import base as img
 
 
+# matches a run of two or more identical bytes
+_RUN_RE = re.compile( rb"(.)\1+", flags=re.DOTALL )
+
+# one-byte strings for every byte value, used to build runs
+_SINGLE_BYTES = [bytes( (i,) ) for i in range( 256 )]
+
+
 class DATCompressor( mrc.Transform ):
     @staticmethod
     def _xor_checksum( data ):
-        lrc = 0
-        for b in data:
-            lrc ^= b
+        # treat the data as one big integer and fold it in half until a single
+        # byte is left; XORing the halves together keeps the bytewise XOR intact
+        lrc = int.from_bytes( data, "little" )
+        width = len( data )
+        while width > 1:
+            half = (width + 1) // 2
+            lrc = (lrc >> (half * 8)) ^ (lrc & ((1 << (half * 8)) - 1))
+            width = half
         return lrc
 
     def import_data( self, buffer, parent=None ):
@@ -57,7 +69,10 @@ class DATCompressor( mrc.Transform ):
         total_num_bytes -= 10
         compressed_size -= 10
 
-        compressed_data = bytearray( buffer[pointer : pointer + compressed_size] )
+        # copy straight out of a view, rather than slicing and then copying again
+        compressed_data = bytearray(
+            memoryview( buffer )[pointer : pointer + compressed_size]
+        )
         if checksum != self._xor_checksum( compressed_data ):
             logger.warning( f"{self}: Checksum doesn't match header" )
 
@@ -66,121 +81,205 @@ class DATCompressor( mrc.Transform ):
 
         # first byte of compressed data is shifted wrongly, fix
         compressed_data[-1] = (compressed_data[-1] << (8 - bit_count)) & 0xff
-        bs = bits.BitStream(
-            compressed_data,
-            start_offset=(compressed_size - 1, bit_count - 1),
-            bytes_reverse=True,
-            bit_endian="little",
-            io_endian="big",
-        )
 
-        def copy_prev_data( blocklen, offset_size, state ):
-            offset = bs.read( offset_size )
-            for i in range( blocklen ):
-                state["dptr"] -= 1
-                state["ddata"][state["dptr"]] = state["ddata"][
-                    state["dptr"] + offset + 1
-                ]
+        # the bitstream is read backwards starting from the end of the compressed data,
+        # with the first bit in the top of each byte. bit-reversing the bytes turns it
+        # into one long little-endian number, which gets consumed from the top down
+        # via an accumulator topped up with 8 bytes at a time.
+        stream = compressed_data.translate( bits.BYTE_REVERSE )
+        stream_pos = len( stream ) - 1
+        acc = stream[-1]
+        acc_bits = bit_count
+
+        def fill( count ):
+            nonlocal acc, acc_bits, stream_pos
+            while acc_bits < count:
+                start = max( stream_pos - 8, 0 )
+                # past the start of the data, keep feeding in zeros
+                chunk = stream[start:stream_pos] or bytes( 8 )
+                acc = (acc << (len( chunk ) * 8)) | int.from_bytes( chunk, "little" )
+                acc_bits += len( chunk ) * 8
+                stream_pos = start
+
+        def read( count ):
+            nonlocal acc, acc_bits
+            if acc_bits < count:
+                fill( count )
+            acc_bits -= count
+            result = acc >> acc_bits
+            acc &= (1 << acc_bits) - 1
+            return result
+
+        # the data is decompressed from end to start. rather than counting a pointer
+        # down, build it up front to back in reverse, then flip it around at the end.
+        # "offset + 1 bytes further along" becomes that many bytes back from the end.
+        rdata = bytearray()
+
+        def copy_prev_data( blocklen, offset ):
+            period = offset + 1
+            if period > len( rdata ):
+                raise Exception(
+                    f"Back-reference of {period} bytes runs past the {len( rdata )} bytes decompressed so far"
+                )
+            # if the reference overlaps the block being written, the block is the
+            # last (offset + 1) bytes repeated; build it in one go.
+            start = len( rdata ) - period
+            if period >= blocklen:
+                rdata.extend( rdata[start : start + blocklen] )
+            else:
+                rdata.extend( (rdata[start:] * (blocklen // period + 1))[:blocklen] )
             return
 
-        def dump_data( num_bytes, state ):
-            for i in range( num_bytes ):
-                state["dptr"] -= 1
-                state["ddata"][state["dptr"]] = bs.read( 8 )
+        def dump_data( num_bytes ):
+            # the raw bytes come out of the stream first to last, i.e. big-endian
+            rdata.extend( read( num_bytes * 8 ).to_bytes( num_bytes, "big" ) )
             return
 
-        state = {
-            "dptr": decompressed_size,
-            "ddata": bytearray( decompressed_size ),
-        }
-
         while True:
-            if bs.read( 1 ) == 1:
-                test = bs.read( 2 )
-                if test == 0:
-                    copy_prev_data( 3, 9, state )
-                elif test == 1:
-                    copy_prev_data( 4, 10, state )
-                elif test == 2:
-                    copy_prev_data( bs.read( 8 ) + 1, 12, state )
-                elif test == 3:
-                    dump_data( bs.read( 8 ) + 9, state )
+            # the first 3 bits of each token tell us the opcode, and with it how many
+            # bits the fixed-size part of the token takes. look at those bits without
+            # consuming them, then read the whole token in one go.
+            #   00 nnn                      - dump n+1 bytes
+            #   01 oooooooo                 - copy 2 bytes from offset o
+            #   100 ooooooooo               - copy 3 bytes from offset o
+            #   101 oooooooooo              - copy 4 bytes from offset o
+            #   110 nnnnnnnn oooooooooooo   - copy n+1 bytes from offset o
+            #   111 nnnnnnnn                - dump n+9 bytes
+            if acc_bits < 3:
+                fill( 3 )
+            test = acc >> (acc_bits - 3)
+            if test < 0b010:
+                dump_data( (read( 5 ) & 0x7) + 1 )
+            elif test < 0b100:
+                copy_prev_data( 2, read( 10 ) & 0xff )
+            elif test == 0b100:
+                copy_prev_data( 3, read( 12 ) & 0x1ff )
+            elif test == 0b101:
+                copy_prev_data( 4, read( 13 ) & 0x3ff )
+            elif test == 0b110:
+                token = read( 23 )
+                copy_prev_data( ((token >> 12) & 0xff) + 1, token & 0xfff )
             else:
-                test = bs.read( 1 )
-                if test == 0:
-                    dump_data( bs.read( 3 ) + 1, state )
-                elif test == 1:
-                    copy_prev_data( 2, 8, state )
-            if not (state["dptr"] > 0):
+                dump_data( (read( 11 ) & 0xff) + 9 )
+            if not (len( rdata ) < decompressed_size):
                 break
 
-        return mrc.TransformResult(
-            payload=bytes( state["ddata"] ), end_offset=pointer
-        )
+        ddata = rdata[:decompressed_size]
+        ddata.reverse()
+        return mrc.TransformResult( payload=bytes( ddata ), end_offset=pointer )
 
     def export_data( self, buffer, parent=None ):
         assert utils.is_bytes( buffer )
+        # the match finder hashes and searches slices, which needs real bytes
+        buffer = bytes( buffer )
 
         decompressed_size = len( buffer )
 
-        bs = bits.BitStream( bit_endian="big", io_endian="little" )
+        # the bitstream is built least significant bit first in an integer accumulator,
+        # with whole 64-bit words flushed out as they fill up. the format wants the
+        # first bit in the top of each byte, so the bytes get bit-reversed at the end.
+        out = bytearray()
+        acc = 0
+        acc_bits = 0
+
+        def write( value, count ):
+            nonlocal acc, acc_bits
+            acc |= value << acc_bits
+            acc_bits += count
+            if acc_bits >= 64:
+                out.extend( (acc & 0xffffffffffffffff).to_bytes( 8, "little" ) )
+                acc >>= 64
+                acc_bits -= 64
 
         pointer = 0
 
-        def encode_raw_data( length, bs ):
+        def encode_raw_data( length ):
             assert length <= 255 + 9
 
             if length > 8:
-                bs.write( length - 9, 8 )
-                bs.write( 0x7, 3 )
+                write( (length - 9) | (0x7 << 8), 11 )
             elif length > 0:
-                bs.write( length - 1, 3 )
-                bs.write( 0x0, 2 )
+                write( (length - 1) | (0x0 << 3), 5 )
+
+        # main form of compression is of the form:
+        # - while decompressing from end to start
+        # - look forward [up to max_offset] bytes in the decompressed data
+        # - copy [up to max_length] bytes to the current decompression position
+        # the largest offset supported by the file format is 4096
+        max_offset = (1 << 12) + 1
+        # largest length supported by the file format is 256
+        max_length = (1 << 8) + 1
+        # how many candidates to try per position before settling for the best so far
+        max_chain = 128
+
+        # scanning the whole window byte by byte for every position takes foreeeever
+        # in Python, so instead chain together the positions that start with the same
+        # three bytes, each one linking to the next occurrence further along.
+        next_match = [0] * decompressed_size
+        last_seen = {}
+        for i in range( decompressed_size - 3, -1, -1 ):
+            key = buffer[i : i + 3]
+            next_match[i] = last_seen.get( key, 0 )
+            last_seen[key] = i
 
         def find_reference():
-            # main form of compression is of the form:
-            # - while decompressing from end to start
-            # - look forward [up to max_offset] bytes in the decompressed data
-            # - copy [up to max_length] bytes to the current decompression position
-            # the largest offset supported by the file format is 4096, but this means
-            # every call to find_reference loops 4096 times.
-            # this takes foreeeever in Python!
-            # because the compression is worthless and time is money, max_offset has
-            # been slashed to 16 to speed up proceedings.
-            # max_offset = (1 << 12) + 1
-            max_offset = (1 << 4) + 1
-            # largest length supported by the file format is 256
-            max_length = (1 << 8) + 1
-
             length = 4  # throw away short references
             offset = 0
             short_offset = [0, 0, 0]
 
-            for i in range( pointer + 1, pointer + max_offset ):
-                temp_len = 0
-                while (temp_len < max_length) and (i + temp_len < decompressed_size):
-                    # record short references
-                    if (temp_len >= 2) and (temp_len <= 4):
-                        if short_offset[temp_len - 2] == 0:
-                            short_offset[temp_len - 2] = i - pointer
-
-                    if buffer[pointer + temp_len] != buffer[i + temp_len]:
-                        break
+            i = next_match[pointer]
+            chain = max_chain
+            while i and (i - pointer < max_offset) and chain:
+                # once there's a long reference, skip anything that can't beat it
+                if offset and (
+                    (i + length >= decompressed_size)
+                    or (buffer[pointer + length] != buffer[i + length])
+                ):
+                    i = next_match[i]
+                    chain -= 1
+                    continue
+
+                temp_len = 3
+                limit = min( max_length - 1, decompressed_size - i )
+                # compare 8 bytes at a time, then find the mismatch byte by byte
+                while (temp_len + 8 <= limit) and (
+                    buffer[pointer + temp_len : pointer + temp_len + 8]
+                    == buffer[i + temp_len : i + temp_len + 8]
+                ):
+                    temp_len += 8
+                while (temp_len < limit) and (
+                    buffer[pointer + temp_len] == buffer[i + temp_len]
+                ):
                     temp_len += 1
 
-                if temp_len == max_length:
-                    temp_len -= 1
+                # record short references
+                if short_offset[1] == 0:
+                    short_offset[1] = i - pointer
+                if (temp_len >= 4) and (short_offset[2] == 0):
+                    short_offset[2] = i - pointer
 
                 # largest reference so far? use it
                 if temp_len > length:
                     length = temp_len
                     offset = i - pointer
+                    if length == max_length - 1:
+                        break
+
+                i = next_match[i]
+                chain -= 1
 
             assert length < max_length
             assert offset < max_offset
 
             # no long references? try short
             if offset == 0:
+                if short_offset[1] == 0 and pointer + 2 <= decompressed_size:
+                    short_offset[0] = (
+                        buffer.find(
+                            buffer[pointer : pointer + 2], pointer + 1, pointer + 258
+                        )
+                        - pointer
+                    )
                 for i in (2, 1, 0):
                     max_short_offset = (1 << (i + 8)) + 1
                     if (short_offset[i] > 0) and (short_offset[i] < max_short_offset):
@@ -195,43 +294,42 @@ class DATCompressor( mrc.Transform ):
             length, ref = find_reference()
             if ref > 0:
                 if raw > 0:
-                    encode_raw_data( raw, bs )
+                    encode_raw_data( raw )
                     raw = 0
+                # each token is written as one value: operands first, opcode on top
                 if length > 4:
-                    bs.write( ref - 1, 12 )
-                    bs.write( length - 1, 8 )
-                    bs.write( 0x6, 3 )
+                    write( (ref - 1) | ((length - 1) << 12) | (0x6 << 20), 23 )
                 elif length == 4:
-                    bs.write( ref - 1, 10 )
-                    bs.write( 0x5, 3 )
+                    write( (ref - 1) | (0x5 << 10), 13 )
                 elif length == 3:
-                    bs.write( ref - 1, 9 )
-                    bs.write( 0x4, 3 )
+                    write( (ref - 1) | (0x4 << 9), 12 )
                 elif length == 2:
-                    bs.write( ref - 1, 8 )
-                    bs.write( 0x1, 2 )
+                    write( (ref - 1) | (0x1 << 8), 10 )
 
                 pointer += length
             else:
-                bs.write( buffer[pointer], 8 )
+                write( buffer[pointer], 8 )
 
                 raw += 1
                 if raw == 264:
-                    encode_raw_data( raw, bs )
+                    encode_raw_data( raw )
                     raw = 0
 
                 pointer += 1
 
-        encode_raw_data( raw, bs )
+        encode_raw_data( raw )
 
-        compressed_data = bytearray( bs.get_buffer() )
-        compressed_data[-1] = compressed_data[-1] >> (8 - bs.tell()[1])
+        out.extend( acc.to_bytes( (acc_bits + 7) // 8, "little" ) )
+        compressed_data = bytearray( out.translate( bits.BYTE_REVERSE ) )
+        # a stream that finishes on a byte boundary has all 8 bits of the last byte in use
+        bit_count = (acc_bits % 8) or 8
+        compressed_data[-1] = compressed_data[-1] >> (8 - bit_count)
 
         compressed_size = len( compressed_data ) + 10
         checksum = self._xor_checksum( compressed_data )
 
         output = bytearray( 6 )
-        output[0:1] = utils.to_uint8( bs.tell()[1] )
+        output[0:1] = utils.to_uint8( bit_count )
         output[1:2] = utils.to_uint8( checksum )
         output[2:6] = utils.to_uint32_be( decompressed_size )
         output[6:10] = utils.to_uint32_be( compressed_size )
@@ -248,17 +346,20 @@ class SpecialCompressor( mrc.Transform ):
     def import_data( self, buffer, parent=None ):
         assert utils.is_bytes( buffer )
         result = []
-        buf_out = []
+        # each segment is decoded into one growing buffer
+        buf_out = bytearray()
         i = 0
-        while i < len( buffer ):
+        size = len( buffer )
+        while i < size:
+            n = buffer[i]
             # 0x00 <= n < 0x80: copy next n+1 bytes to output stream
-            if buffer[i] in range( 0x00, 0x80 ):
-                count = buffer[i] + 1
-                buf_out.append( buffer[i + 1 : i + 1 + count] )
+            if n < 0x80:
+                count = n + 1
+                buf_out += buffer[i + 1 : i + 1 + count]
                 i += count + 1
             # n == 0x80: end of segment
-            elif buffer[i] == 0x80:
-                product = b"".join( buf_out )
+            elif n == 0x80:
+                product = bytes( buf_out )
                 if len( product ) != self.DECOMPRESSED_SIZE:
                     logger.warning(
                         "{}: was expecting {} bytes of data, got {}".format(
@@ -266,24 +367,22 @@ class SpecialCompressor( mrc.Transform ):
                         )
                     )
                 result.append( product )
-                buf_out = []
+                buf_out = bytearray()
                 i += 1
             # 0x81 <= n < 0xff: repeat next byte (257-n) times
             else:
-                count = 257 - buffer[i]
-                buf_out.append( buffer[i + 1 : i + 2] * count )
+                count = 257 - n
+                buf_out += _SINGLE_BYTES[buffer[i + 1]] * count
                 i += 2
 
         if buf_out:
             logger.warning( f"{self}: EOF reached before last RLE block closed" )
-            result.append( b"".join( buf_out ) )
+            result.append( bytes( buf_out ) )
 
         # result is a 960x160 3bpp image, divided into 4x 40 scanline segments
         unpack = (self.plan.import_data( x ).payload for x in result)
 
-        return mrc.TransformResult(
-            payload=bytes( itertools.chain( *unpack ) ), end_offset=i
-        )
+        return mrc.TransformResult( payload=b"".join( unpack ), end_offset=i )
 
     def export_data( self, buffer, parent=None ):
         assert utils.is_bytes( buffer )
@@ -294,35 +393,37 @@ class SpecialCompressor( mrc.Transform ):
 
         result = bytearray()
 
+        def encode_literal( data ):
+            # 0x00 <= n < 0x80: copy next n+1 bytes to output stream
+            for i in range( 0, len( data ), 128 ):
+                chunk = data[i : i + 128]
+                result.append( len( chunk ) - 1 )
+                result.extend( chunk )
+
         for segment in segments:
+            # only the runs need finding; everything between two runs is a stretch
+            # of lone bytes that can be copied out as literal blocks
             pointer = 0
-            while pointer < len( segment ):
-                start = pointer
-                end = pointer + 1
-                if end >= len( segment ):
-                    result.append( 0x00 )
-                    result.append( segment[start] )
-                    pointer += 1
-                elif segment[end] == segment[start]:
-                    while (
-                        ((end + 1) < len( segment ))
-                        and (segment[end + 1] == segment[end])
-                        and (end - start < 127)
-                    ):
-                        end += 1
-                    result.append( 257 - (end + 1 - start) )
+            pending = b""
+            for match in _RUN_RE.finditer( segment ):
+                start, end = match.span()
+                encode_literal( pending + segment[pointer:start] )
+                # 0x81 <= n < 0xff: repeat next byte (257-n) times
+                count = end - start
+                while count >= 2:
+                    length = min( count, 128 )
+                    result.append( 257 - length )
                     result.append( segment[start] )
-                    pointer = end + 1
-                else:
-                    while (
-                        ((end + 1) < len( segment ))
-                        and (segment[end + 1] != segment[end])
-                        and (end - 1 - start < 128)
-                    ):
-                        end += 1
-                    result.append( end - 1 - start )
-                    result.extend( segment[start:end] )
-                    pointer = end
+                    count -= length
+                # a single byte left over joins the next literal block
+                pending = segment[end - count : end]
+                pointer = end
+
+            # the final byte of a segment is always written as a block by itself
+            tail = pending + segment[pointer:]
+            if tail:
+                encode_literal( tail[:-1] )
+                encode_literal( tail[-1:] )
 
             result.append( 0x80 )
 
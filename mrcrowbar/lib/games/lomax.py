@@ -3,6 +3,11 @@ from __future__ import annotations
 from mrcrowbar import models as mrc
 from mrcrowbar.lib.images import base as img
 
+# translate tables for splitting bytes into nibbles and back
+_LOW_NIBBLE = bytes( i & 0x0f for i in range( 256 ) )
+_HIGH_NIBBLE = bytes( i >> 4 for i in range( 256 ) )
+_NIBBLE_TO_HIGH = bytes( (i << 4) & 0xff for i in range( 256 ) )
+
 
 class FourBit( mrc.Transform ):
     def __init__( self, enable=True ):
@@ -14,10 +19,10 @@ class FourBit( mrc.Transform ):
         if not enable:
             return mrc.TransformResult( payload=buffer, end_offset=len( buffer ) )
 
-        output = bytearray( len( buffer ) * 2 )
-        for i in range( len( buffer ) ):
-            output[2 * i] = buffer[i] & 0x0f
-            output[2 * i + 1] = buffer[i] >> 4
+        source = bytes( buffer )
+        output = bytearray( len( source ) * 2 )
+        output[0::2] = source.translate( _LOW_NIBBLE )
+        output[1::2] = source.translate( _HIGH_NIBBLE )
         return mrc.TransformResult( payload=output, end_offset=len( buffer ) )
 
     def export_data( self, buffer, parent=None ):
@@ -28,12 +33,13 @@ class FourBit( mrc.Transform ):
 
         if buffer:
             assert max( buffer ) <= 0xf
-        output = bytearray( len( buffer ) // 2 )
-        for i in range( len( buffer ) ):
-            if i % 2:
-                output[i // 2] |= buffer[i] << 4
-            else:
-                output[i // 2] |= buffer[i]
+        assert len( buffer ) % 2 == 0
+        size = len( buffer ) // 2
+        source = bytes( buffer )
+        # the nibble streams don't overlap, so or-ing them as big ints packs every pair
+        low = int.from_bytes( source[0::2], "little" )
+        high = int.from_bytes( source[1::2].translate( _NIBBLE_TO_HIGH ), "little" )
+        output = bytearray( (low | high).to_bytes( size, "little" ) )
         return mrc.TransformResult( payload=output, end_offset=len( buffer ) )
 
 
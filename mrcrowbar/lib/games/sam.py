@@ -24,23 +24,21 @@ class SAMEncryption( mrc.Transform ):
     def __init__( self, length=None ):
         self.length = length
 
+    def _apply_key( self, data ):
+        # xor against the repeating key in one go, as big integers
+        size = len( data )
+        key = (self.KEY * (size // len( self.KEY ) + 1))[:size]
+        result = int.from_bytes( data, "little" ) ^ int.from_bytes( key, "little" )
+        return result.to_bytes( size, "little" )
+
     def import_data( self, buffer, parent=None ):
         limit = len( buffer ) if not self.length else min( len( buffer ), self.length )
-        payload = bytes(
-            [
-                bits.reverse_bits( c ) ^ self.KEY[i % len( self.KEY )]
-                for i, c in enumerate( buffer[:limit] )
-            ]
-        )
+        payload = bytes( buffer[:limit] ).translate( bits.BYTE_REVERSE )
+        payload = self._apply_key( payload )
         return mrc.TransformResult( payload=payload, end_offset=limit )
 
     def export_data( self, buffer, parent=None ):
-        payload = bytes(
-            [
-                bits.reverse_bits( c ^ self.KEY[i % len( self.KEY )] )
-                for i, c in enumerate( buffer )
-            ]
-        )
+        payload = self._apply_key( bytes( buffer ) ).translate( bits.BYTE_REVERSE )
         return mrc.TransformResult( payload=payload )
 
 
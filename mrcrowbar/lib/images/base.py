@@ -24,6 +24,11 @@ from array import array
 
 logger = logging.getLogger( __name__ )
 
+# bits.unpack_bits for every possible byte, used by Planarizer
+_UNPACK_BITS = [bits.unpack_bits( i ) for i in range( 256 )]
+# the same table shifted up for each of the 8 possible planes
+_UNPACK_BITS_SHIFTED = [[x << i for x in _UNPACK_BITS] for i in range( 8 )]
+
 
 class Colour( BaseColour, mrc.Block ):
     pass
@@ -601,33 +606,44 @@ class Planarizer( mrc.Transform ):
         # in order for the calculations to be fast, planar graphics are pretty much always divisible by 8.
         # we're going to abuse this and unpack our bitplanes using 64-bit integers.
         # let's make a big array of them.
-        planes = array( "Q", (0,) * (plane_size) )
         segment_size = plane_size + plane_padding
 
         for f in range( frame_count ):
             pointer = frame_offset + f * frame_stride
+            chunky = [0] * plane_size
             for bi, b in enumerate( plane_order ):
-                for i in range( plane_size ):
-                    # for the first iteration, clear the plane
-                    if bi == 0:
-                        planes[i] = 0
-
-                    if row_planar_size is None:
-                        address = pointer + b * segment_size + i
-                    else:
-                        address = (
-                            pointer
-                            + (row_planar_size * bpp) * (i // row_planar_size)
-                            + row_planar_size * b
-                            + (i % row_planar_size)
-                        )
-
-                    # bits.unpack_bits is a helper method which converts a 1-byte bitfield
-                    # into 8 bool bytes (i.e. 1 or 0) stored as a 64-bit int.
-                    # we can effectively work on 8 chunky pixels at once!
-                    # because the chunky pixels are bitfields, combining planes is an easy
-                    # left shift (i.e. move all the bits up by [plane ID] places) and bitwise OR
-                    planes[i] |= bits.unpack_bits( buffer[address] ) << bi
+                # gather up the bytes for this plane in one go
+                if row_planar_size is None:
+                    start = pointer + b * segment_size
+                    plane = buffer[start : start + plane_size]
+                else:
+                    row_start = pointer + row_planar_size * b
+                    row_stride = row_planar_size * bpp
+                    plane = b"".join(
+                        buffer[
+                            row_start
+                            + r * row_stride : row_start
+                            + r * row_stride
+                            + row_planar_size
+                        ]
+                        for r in range( math.ceil( plane_size / row_planar_size ) )
+                    )[:plane_size]
+                if len( plane ) != plane_size:
+                    raise IndexError( "Planar data runs past the end of the buffer" )
+
+                # bits.unpack_bits is a helper method which converts a 1-byte bitfield
+                # into 8 bool bytes (i.e. 1 or 0) stored as a 64-bit int.
+                # we can effectively work on 8 chunky pixels at once!
+                # because the chunky pixels are bitfields, combining planes is an easy
+                # left shift (i.e. move all the bits up by [plane ID] places) and bitwise OR.
+                # a whole plane is folded in per pass, rather than a byte at a time, using
+                # a 256 entry lookup table with the shift for this plane already applied.
+                lookup = _UNPACK_BITS_SHIFTED[bi]
+                if bi == 0:
+                    chunky = [lookup[x] for x in plane]
+                else:
+                    chunky = [c | lookup[x] for c, x in zip( chunky, plane )]
+            planes = array( "Q", chunky )
 
             # check for endianness! for most intel and ARM chips the order of bytes in hardware is reversed,
             # so we need to flip it around for the bytes to be sequential.
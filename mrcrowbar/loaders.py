@@ -92,29 +92,79 @@ class Loader:
         self.unique_matches = unique_matches
         self.re_flags = re.IGNORECASE if not case_sensitive else 0
         self.file_re_map = {
-            key: re.compile( key, flags=self.re_flags )
+            key: self._compile( key )
             for key, klass in file_class_map.items()
             if klass
         }
+        self.dependency_re_list = [
+            (self._compile( consumer ), self._compile( dependency ))
+            for consumer, dependency, _, _ in (dependency_list or [])
+        ]
+        self.file_re_combined, self.file_re_groups = self._combine(
+            self.file_re_map
+        )
         self._files = OrderedDict()
 
+    def _compile( self, pattern ):
+        # patterns can be supplied pre-compiled, in which case their flags are kept
+        if isinstance( pattern, re.Pattern ):
+            return pattern
+        return re.compile( pattern, flags=self.re_flags )
+
+    def _combine( self, re_map ):
+        # fold all of the patterns into a single regex, so each path only gets scanned once.
+        # every pattern sits in its own lookahead and the alternatives are listed in reverse,
+        # which keeps the old behaviour of searching with each pattern and the last match winning.
+        if not re_map or not all(
+            isinstance( key, str ) and not re.search( r"\\[1-9]", key )
+            for key in re_map
+        ):
+            return None, {}
+        parts = []
+        groups = {}
+        index = 1
+        for key in reversed( list( re_map ) ):
+            parts.append( f"(?=[\\s\\S]*?({key}))" )
+            groups[index] = (key, re_map[key].groups)
+            index += 1 + re_map[key].groups
+        try:
+            return re.compile( "|".join( parts ), flags=self.re_flags ), groups
+        except re.error:
+            return None, {}
+
+    def _match_file( self, path ):
+        if self.file_re_combined is None:
+            result = None
+            for key, regex in self.file_re_map.items():
+                match = regex.search( path )
+                if match:
+                    result = key, match.groups()
+            return result
+
+        match = self.file_re_combined.match( path )
+        if not match:
+            return None
+        # the pattern's own wrapper group is always the last one to close
+        index = match.lastindex
+        key, count = self.file_re_groups[index]
+        return key, match.groups()[index : index + count]
+
     def load( self, target_path ):
         # target_path = os.path.abspath( target_path )
         self.fs = FileSystem( target_path )
         for f in self.fs.list_files():
-
-            for key, regex in self.file_re_map.items():
-                match = regex.search( f )
-                if match:
-                    self._files[f] = {
-                        "klass": self.file_class_map[key],
-                        "re": key,
-                        "match": match.groups(),
-                    }
-                    if not self.case_sensitive:
-                        self._files[f]["match"] = tuple(
-                            [x.upper() for x in self._files[f]["match"]]
-                        )
+            result = self._match_file( f )
+            if result:
+                key, groups = result
+                self._files[f] = {
+                    "klass": self.file_class_map[key],
+                    "re": key,
+                    "match": groups,
+                }
+                if not self.case_sensitive:
+                    self._files[f]["match"] = tuple(
+                        [x.upper() for x in self._files[f]["match"]]
+                    )
 
         if self.unique_matches:
             unique_check = {
@@ -141,8 +191,7 @@ class Loader:
             for i, (consumer, dependency, format, attr) in enumerate(
                 self.dependency_list
             ):
-                consumer_re = re.compile( consumer, flags=self.re_flags )
-                dependency_re = re.compile( dependency, flags=self.re_flags )
+                consumer_re, dependency_re = self.dependency_re_list[i]
                 consumer_matches = []
                 dependency_matches = []
                 if not self.case_sensitive:
@@ -214,7 +263,9 @@ class Loader:
 
         # load files in based on dependency sorted list order
         logger.info( f"{self}: loading files" )
-        for path in load_order:
+        for i, path in enumerate( load_order ):
+            if i + 1 < len( load_order ):
+                self._prefetch( load_order[i + 1] )
             info = self._files[path]
             with self.fs.get_file( path ) as f:
                 data = mmap( f.fileno(), 0 )
@@ -231,6 +282,17 @@ class Loader:
         self.post_load()
         return
 
+    def _prefetch( self, path ):
+        # hint to the OS that the next file is wanted, so it can be read in the
+        # background while the current one is being parsed
+        if not hasattr( os, "posix_fadvise" ):
+            return
+        try:
+            with self.fs.get_file( path ) as f:
+                os.posix_fadvise( f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED )
+        except OSError:
+            pass
+
     def post_load( self ):
         pass
 
@@ -1,11 +1,18 @@
 from __future__ import annotations
 
 import enum
+import os
+import re
+import struct
+import tempfile
 import unittest
 
 from mrcrowbar import bits
 from mrcrowbar import models as mrc
 from mrcrowbar import sound
+from mrcrowbar import utils
+from mrcrowbar.lib.games import keen
+from mrcrowbar.lib.platforms import director
 
 
 class TestBlock( unittest.TestCase ):
@@ -42,6 +49,39 @@ class TestBlock( unittest.TestCase ):
         test = Test()
         self.assertEqual( test.get_size(), 0x0a )
 
+    def test_sizing_fixed( self ):
+        class Fixed( mrc.Block ):
+            field1 = mrc.UInt16_LE( 0x00 )
+            field2 = mrc.Bits( 0x02, 0b11110000 )
+            check = mrc.Const( mrc.UInt8( 0x03 ), 0x00 )
+
+        class Dynamic( mrc.Block ):
+            count = mrc.UInt8( 0x00 )
+            data = mrc.UInt8( 0x01, count=mrc.Ref( "count" ) )
+
+        self.assertEqual( Fixed._fixed_size, 4 )
+        self.assertEqual( Fixed( b"\x01\x02\x30\x00" ).get_size(), 4 )
+        self.assertIsNone( Dynamic._fixed_size )
+        self.assertEqual( Dynamic( b"\x03\x01\x02\x03" ).get_size(), 4 )
+
+        # streamed fields run to the end of the buffer, so can't be fixed
+        class Streamed( mrc.Block ):
+            data = mrc.UInt16_LE( 0x00, stream=True )
+
+        class Parent( mrc.Block ):
+            children = mrc.BlockField( Streamed, 0x00, count=2 )
+
+        self.assertIsNone( Streamed._fixed_size )
+        parent = Parent( b"\x01\x00\x02\x00\x03\x00" )
+        self.assertEqual( [child.data for child in parent.children], [[1, 2, 3]] )
+        self.assertEqual( parent.get_size(), 6 )
+
+    def test_sizing_stream_export( self ):
+        payload = b"\x00\x00\x00\x00" + struct.pack( ">5I", 1, 2, 3, 4, 5 )
+        cast_list = director.CastListV4( payload )
+        self.assertEqual( cast_list.get_size(), 24 )
+        self.assertEqual( cast_list.export_data(), payload )
+
     def test_pointer( self ):
         class Test( mrc.Block ):
             offset = mrc.Pointer( mrc.UInt8( 0x00 ), mrc.EndOffset( "count" ) )
@@ -242,6 +282,24 @@ class TestBlockField( unittest.TestCase ):
         self.assertEqual( test.field[3].field2, 0xf0 )
         self.assertEqual( test.export_data(), payload )
 
+    def test_block_stream_bytes( self ):
+        class Element( mrc.Block ):
+            field1 = mrc.UInt8()
+            field2 = mrc.Bytes( length=3 )
+
+        class Test( mrc.Block ):
+            field = mrc.BlockField( Element, stream=True )
+
+        payload = bytearray( b"\x12abc\x34def" )
+
+        test = Test( payload )
+        self.assertEqual( test.field[0].field2, b"abc" )
+        self.assertIsInstance( test.field[0].field2, bytes )
+        self.assertEqual( test.field[1].field1, 0x34 )
+        self.assertEqual( test.field[1].field2, b"def" )
+        self.assertIsInstance( test.field[1].field2, bytes )
+        self.assertEqual( test.export_data(), payload )
+
     def test_block_stream_end( self ):
         class Element( mrc.Block ):
             field1 = mrc.UInt8()
@@ -544,6 +602,27 @@ class TestNumberFields( unittest.TestCase ):
             self.assertEqual( test.f64, 32768.0 )
             self.assertEqual( test.export_data(), payload )
 
+    def test_number_arrays( self ):
+        class Test( mrc.Block ):
+            ui16 = mrc.UInt16_LE( 0x00, count=3 )
+            i32 = mrc.Int32_BE( 0x06, count=2 )
+            ui8 = mrc.UInt8( 0x0e, count=4 )
+
+        payload = b"\x01\x00\x02\x00\x03\x00\xff\xff\xff\xfe\x00\x00\x00\x01\x0a\x0b"
+        test = Test( payload )
+        self.assertEqual( test.ui16, [1, 2, 3] )
+        self.assertEqual( test.i32, [-2, 1] )
+        # arrays that run past the end of the buffer return the complete elements
+        self.assertEqual( test.ui8, [0x0a, 0x0b] )
+
+    def test_endian_unresolved( self ):
+        class Test( mrc.Block ):
+            ui16 = mrc.UInt16_P( 0x00 )
+
+        # with no parent endian there's no byte order to decode with
+        with self.assertRaises( KeyError ):
+            Test( b"\x01\x02" )
+
 
 class TestStore( unittest.TestCase ):
     def test_store( self ):
@@ -618,6 +697,76 @@ class TestStore( unittest.TestCase ):
         self.assertEqual( test.export_data(), new_payload )
 
 
+class TestLoader( unittest.TestCase ):
+    def test_loader( self ):
+        class Header( mrc.Block ):
+            value = mrc.UInt8( 0x00 )
+
+        class Data( mrc.Block ):
+            _header = None
+            payload = mrc.Bytes( 0x00 )
+
+        sep = mrc.Loader._SEP
+        file_class_map = {
+            sep + r"(HEAD)\.([0-9])$": Header,
+            re.compile( sep + r"(DATA)\.([0-9])$", flags=re.IGNORECASE ): Data,
+        }
+        deps = [
+            (
+                sep + r"(DATA)\.([0-9])$",
+                sep + r"(HEAD)\.([0-9])$",
+                ("HEAD", "{1}"),
+                "_header",
+            )
+        ]
+
+        with tempfile.TemporaryDirectory() as base:
+            for name, data in (("head.1", b"\x12"), ("data.1", b"abc")):
+                with open( os.path.join( base, name ), "wb" ) as f:
+                    f.write( data )
+
+            loader = mrc.Loader( file_class_map, deps )
+            loader.load( base )
+
+        self.assertEqual( len( loader ), 2 )
+        head = loader[os.path.join( ".", "head.1" )]
+        data = loader[os.path.join( ".", "data.1" )]
+        self.assertIsInstance( head, Header )
+        self.assertIsInstance( data, Data )
+        self.assertEqual( data.payload, b"abc" )
+        self.assertIs( data._header, head )
+
+    def test_loader_overlap( self ):
+        class Generic( mrc.Block ):
+            payload = mrc.Bytes( 0x00 )
+
+        class Level( mrc.Block ):
+            payload = mrc.Bytes( 0x00 )
+
+        sep = mrc.Loader._SEP
+        # when several patterns match, the last one in the map wins
+        file_class_map = {
+            sep + r"(.*)\.(DAT)$": Generic,
+            sep + r"(LEVEL)([0-9]{3})\.DAT$": Level,
+        }
+
+        with tempfile.TemporaryDirectory() as base:
+            for name in ("level001.dat", "main.dat", "readme.txt"):
+                with open( os.path.join( base, name ), "wb" ) as f:
+                    f.write( b"data" )
+
+            loader = mrc.Loader( file_class_map )
+            loader.load( base )
+
+        self.assertEqual( len( loader ), 2 )
+        self.assertIsInstance( loader[os.path.join( ".", "level001.dat" )], Level )
+        self.assertIsInstance( loader[os.path.join( ".", "main.dat" )], Generic )
+        self.assertEqual(
+            loader._files[os.path.join( ".", "level001.dat" )]["match"],
+            ("LEVEL", "001"),
+        )
+
+
 class TestBits( unittest.TestCase ):
     def test_bits_field( self ):
         class Test( mrc.Block ):
@@ -755,6 +904,33 @@ class TestBits( unittest.TestCase ):
         self.assertEqual( bs.tell(), (2, 6) )
 
 
+class TestLZW( unittest.TestCase ):
+    def test_truncated( self ):
+        # a run of literal "A" codes then the end code, packed MSB-first,
+        # with the code width growing at the same points as the decoder
+        count = 1790
+        codes, code_bits, usebits, lookup_len = 0, 0, 9, 258
+        for i in range( count ):
+            codes = (codes << usebits) | 0x41
+            code_bits += usebits
+            if i:
+                lookup_len += 1
+                if lookup_len == (1 << usebits) - 1:
+                    usebits = min( usebits + 1, 12 )
+        codes = (codes << usebits) | 0x101
+        code_bits += usebits
+        padding = -code_bits % 8
+        payload = utils.to_uint32_le( count ) + utils.to_uint16_le( 12 )
+        payload += (codes << padding).to_bytes( (code_bits + padding) // 8, "big" )
+
+        lzw = keen.LZWCompressor()
+        self.assertEqual( lzw.import_data( payload ).payload, b"A" * count )
+        # cutting off the last two bytes leaves the final code unfinishable;
+        # the decoder has to give up instead of padding with zeros forever
+        with self.assertRaises( Exception ):
+            lzw.import_data( payload[:-2] )
+
+
 class TestSound( unittest.TestCase ):
     def test_resampling( self ):
         source = b"\x80" * sound.RESAMPLE_BUFFER + b"\x00" * sound.RESAMPLE_BUFFER